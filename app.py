@@ -6,12 +6,15 @@ Gradio-based web interface for 3D generation.
 This is a complementary interface to the Unity Editor integration.
 """
 
-import gradio as gr
+import io
+import json
 import os
 import sys
 from pathlib import Path
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 import time
 
@@ -20,57 +23,126 @@ API_URL = os.environ.get("TRELLIS2_API_URL", "http://localhost:8000")
 OUTPUT_DIR = Path(__file__).parent / "outputs"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Shared HTTP session so status polling and downloads reuse pooled connections.
+# Connection failures are retried for any method; gateway errors only for
+# GET/HEAD, since a proxy 504 can arrive after a submission was already queued.
+_RETRY = Retry(
+    total=3,
+    read=0,
+    backoff_factor=0.2,
+    status_forcelist=[502, 503, 504],
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    raise_on_status=False,
+)
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "trellis2-unity-studio-webui"
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=_RETRY))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=_RETRY))
+
+# A successful health check (or job round trip) is trusted for this many seconds
+_HEALTH_TTL = 10.0
+_LAST_OK = 0.0
+
 
 def check_server():
     """Check if the API server is running."""
+    global _LAST_OK
+    if time.time() - _LAST_OK < _HEALTH_TTL:
+        return True
     try:
-        resp = requests.get(f"{API_URL}/health", timeout=5)
-        return resp.status_code == 200
+        resp = SESSION.head(f"{API_URL}/health", timeout=1)
     except:
         return False
+    if resp.status_code == 200:
+        _LAST_OK = time.time()
+        return True
+    return False
+
+
+def _submit(path: str, **kwargs) -> str:
+    """POST a job submission and return its job id."""
+    resp = SESSION.post(
+        f"{API_URL}{path}",
+        headers={"Accept": "application/json"},
+        timeout=30,
+        **kwargs,
+    )
+    resp.raise_for_status()
+    return resp.json()["job_id"]
 
 
 def submit_text_job(prompt: str, quality: str, seed: int):
     """Submit a text-to-3D job."""
-    resp = requests.post(
-        f"{API_URL}/submit/text",
+    return _submit(
+        "/submit/text",
         json={"prompt": prompt, "quality": quality.lower(), "seed": seed}
     )
-    resp.raise_for_status()
-    return resp.json()["job_id"]
 
 
-def submit_image_job(image_path: str, quality: str, seed: int):
-    """Submit an image-to-3D job."""
-    with open(image_path, "rb") as f:
-        resp = requests.post(
-            f"{API_URL}/submit/image",
-            files={"file": f},
-            params={"quality": quality.lower(), "seed": seed}
-        )
-    resp.raise_for_status()
-    return resp.json()["job_id"]
+def submit_image_job(image, quality: str, seed: int):
+    """Submit an image-to-3D job from a PIL image."""
+    # Encode in memory with fast PNG compression; no shared temp file on disk
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", optimize=False, compress_level=1)
+    buf.seek(0)
+    return _submit(
+        "/submit/image",
+        files={"file": ("input.png", buf, "image/png")},
+        params={"quality": quality.lower(), "seed": seed}
+    )
+
+
+def _report_status(data: dict, start: float, progress) -> bool:
+    """Update progress from a status payload. Returns True once the job is done."""
+    status = data.get("status", "unknown")
+    elapsed = time.time() - start
+    stage = data.get("stage_description", status)
+    
+    progress(0.5, desc=f"{stage} ({elapsed:.0f}s)")
+    
+    if status == "failed":
+        raise Exception(data.get("error", "Job failed"))
+    return status == "done"
 
 
-def wait_for_job(job_id: str, progress=gr.Progress()):
+def _stream_job_events(job_id: str):
+    """Yield status payloads pushed by the server's /stream endpoint."""
+    with SESSION.get(f"{API_URL}/stream/{job_id}", stream=True, timeout=(5, 60)) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines(decode_unicode=True):
+            if line and line.startswith("data: "):
+                yield json.loads(line[len("data: "):])
+
+
+def wait_for_job(job_id: str, progress):
     """Wait for job completion with progress updates."""
+    global _LAST_OK
     start = time.time()
+    
+    # Prefer server-sent events; fall back to long-polling if the stream is unavailable
+    try:
+        for data in _stream_job_events(job_id):
+            if _report_status(data, start, progress):
+                _LAST_OK = time.time()
+                return data
+    except (requests.RequestException, ValueError):
+        pass
+    
+    # Long-poll: the server holds each request until the stage changes
+    last_stage = None
     while True:
-        resp = requests.get(f"{API_URL}/status/{job_id}")
+        t0 = time.time()
+        resp = SESSION.get(f"{API_URL}/status/{job_id}", params={"wait": 30}, timeout=35)
         data = resp.json()
         
-        status = data.get("status", "unknown")
-        elapsed = time.time() - start
-        stage = data.get("stage_description", status)
-        
-        progress(0.5, desc=f"{stage} ({elapsed:.0f}s)")
-        
-        if status == "done":
+        if _report_status(data, start, progress):
+            _LAST_OK = time.time()
             return data
-        elif status == "failed":
-            raise Exception(data.get("error", "Job failed"))
         
-        time.sleep(2)
+        # Servers without long-poll support answer immediately with no change
+        if data.get("stage") == last_stage and time.time() - t0 < 1:
+            time.sleep(2)
+        last_stage = data.get("stage")
 
 
 def download_result(job_data: dict):
@@ -84,97 +156,97 @@ def download_result(job_data: dict):
     job_id = job_data["job_id"]
     local_path = OUTPUT_DIR / f"{job_id}.glb"
     
-    resp = requests.get(f"{API_URL}/{glb_url}")
-    resp.raise_for_status()
-    
-    with open(local_path, "wb") as f:
-        f.write(resp.content)
+    # Stream to disk in 1 MB chunks so large GLBs are never held in memory
+    with SESSION.get(f"{API_URL}/{glb_url}", stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        with open(local_path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
     
     return str(local_path)
 
 
-def generate_from_text(prompt: str, quality: str, seed: int, progress=gr.Progress()):
-    """Generate 3D model from text prompt."""
-    if not check_server():
-        raise gr.Error("Server not running. Start with: python src/trellis2_server.py")
+def build_demo():
+    """Build the Gradio interface. Gradio is imported here to keep startup light."""
+    import gradio as gr
     
-    if not prompt.strip():
-        raise gr.Error("Please enter a prompt")
+    def generate_from_text(prompt: str, quality: str, seed: int, progress=gr.Progress()):
+        """Generate 3D model from text prompt."""
+        if not check_server():
+            raise gr.Error("Server not running. Start with: python src/trellis2_server.py")
     
-    progress(0.1, desc="Submitting job...")
-    job_id = submit_text_job(prompt, quality, seed)
+        if not prompt.strip():
+            raise gr.Error("Please enter a prompt")
     
-    progress(0.2, desc="Processing...")
-    job_data = wait_for_job(job_id, progress)
+        progress(0.1, desc="Submitting job...")
+        job_id = submit_text_job(prompt, quality, seed)
     
-    progress(0.9, desc="Downloading...")
-    glb_path = download_result(job_data)
+        progress(0.2, desc="Processing...")
+        job_data = wait_for_job(job_id, progress)
     
-    progress(1.0, desc="Done!")
-    return glb_path, f"✅ Generated: {Path(glb_path).name}"
-
-
-def generate_from_image(image, quality: str, seed: int, progress=gr.Progress()):
-    """Generate 3D model from image."""
-    if not check_server():
-        raise gr.Error("Server not running. Start with: python src/trellis2_server.py")
+        progress(0.9, desc="Downloading...")
+        glb_path = download_result(job_data)
     
-    if image is None:
-        raise gr.Error("Please upload an image")
+        progress(1.0, desc="Done!")
+        return glb_path, f"✅ Generated: {Path(glb_path).name}"
     
-    # Save temp image
-    temp_path = OUTPUT_DIR / "temp_input.png"
-    image.save(temp_path)
+    def generate_from_image(image, quality: str, seed: int, progress=gr.Progress()):
+        """Generate 3D model from image."""
+        if not check_server():
+            raise gr.Error("Server not running. Start with: python src/trellis2_server.py")
     
-    progress(0.1, desc="Submitting job...")
-    job_id = submit_image_job(str(temp_path), quality, seed)
+        if image is None:
+            raise gr.Error("Please upload an image")
     
-    progress(0.2, desc="Processing...")
-    job_data = wait_for_job(job_id, progress)
+        progress(0.1, desc="Submitting job...")
+        job_id = submit_image_job(image, quality, seed)
     
-    progress(0.9, desc="Downloading...")
-    glb_path = download_result(job_data)
+        progress(0.2, desc="Processing...")
+        job_data = wait_for_job(job_id, progress)
     
-    progress(1.0, desc="Done!")
-    return glb_path, f"✅ Generated: {Path(glb_path).name}"
-
-
-# Build interface
-with gr.Blocks(title="TRELLIS.2 Unity Studio", theme=gr.themes.Soft()) as demo:
-    gr.Markdown("""
-    # 🎮 TRELLIS.2 Unity Studio
-    **Web Interface for 3D Generation**
+        progress(0.9, desc="Downloading...")
+        glb_path = download_result(job_data)
+    
+        progress(1.0, desc="Done!")
+        return glb_path, f"✅ Generated: {Path(glb_path).name}"
     
-    For Unity integration, use the Editor window: `Tools > TRELLIS.2 > Generation Window`
-    """)
+    with gr.Blocks(title="TRELLIS.2 Unity Studio", theme=gr.themes.Soft()) as demo:
+        gr.Markdown("""
+        # 🎮 TRELLIS.2 Unity Studio
+        **Web Interface for 3D Generation**
     
-    with gr.Row():
-        with gr.Column():
-            with gr.Tabs():
-                with gr.Tab("Text to 3D"):
-                    prompt = gr.Textbox(label="Prompt", placeholder="A cute robot toy")
-                    text_btn = gr.Button("Generate", variant="primary")
+        For Unity integration, use the Editor window: `Tools > TRELLIS.2 > Generation Window`
+        """)
+    
+        with gr.Row():
+            with gr.Column():
+                with gr.Tabs():
+                    with gr.Tab("Text to 3D"):
+                        prompt = gr.Textbox(label="Prompt", placeholder="A cute robot toy")
+                        text_btn = gr.Button("Generate", variant="primary")
                 
-                with gr.Tab("Image to 3D"):
-                    image = gr.Image(type="pil", label="Input Image")
-                    image_btn = gr.Button("Generate", variant="primary")
+                    with gr.Tab("Image to 3D"):
+                        image = gr.Image(type="pil", label="Input Image")
+                        image_btn = gr.Button("Generate", variant="primary")
             
-            with gr.Accordion("Settings", open=False):
-                quality = gr.Radio(["Fast", "Balanced", "High"], value="Balanced", label="Quality")
-                seed = gr.Number(value=42, label="Seed", precision=0)
+                with gr.Accordion("Settings", open=False):
+                    quality = gr.Radio(["Fast", "Balanced", "High"], value="Balanced", label="Quality")
+                    seed = gr.Number(value=42, label="Seed", precision=0)
         
-        with gr.Column():
-            output = gr.File(label="Generated GLB")
-            status = gr.Textbox(label="Status", interactive=False)
+            with gr.Column():
+                output = gr.File(label="Generated GLB")
+                status = gr.Textbox(label="Status", interactive=False)
+    
+        gr.Markdown("""
+        ---
+        **Server:** Make sure the API server is running: `uvicorn src.trellis2_server:app --port 8000`
+        """)
     
-    gr.Markdown("""
-    ---
-    **Server:** Make sure the API server is running: `uvicorn src.trellis2_server:app --port 8000`
-    """)
+        # Events
+        text_btn.click(generate_from_text, [prompt, quality, seed], [output, status])
+        image_btn.click(generate_from_image, [image, quality, seed], [output, status])
     
-    # Events
-    text_btn.click(generate_from_text, [prompt, quality, seed], [output, status])
-    image_btn.click(generate_from_image, [image, quality, seed], [output, status])
+    return demo
 
 
 def main():
@@ -190,6 +262,7 @@ def main():
     print(f"API Server: {API_URL}")
     print(f"{'='*50}\n")
     
+    demo = build_demo()
     demo.launch(server_port=args.port, share=args.share)
 
 
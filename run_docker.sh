@@ -113,9 +113,10 @@ docker run \
     -p 7860:7860 \
     -v "$(pwd)/outputs:/app/outputs" \
     -v "$HOME/.cache/huggingface:/root/.cache/huggingface" \
+    -v "$HOME/.cache/trellis2:/root/.cache/trellis2" \
     -e MEMORY_MODE="$MEMORY_MODE" \
     -e NVIDIA_VISIBLE_DEVICES=all \
-    -e PYTORCH_CUDA_ALLOC_CONF=expandable_segments:True \
+    -e PYTORCH_CUDA_ALLOC_CONF=expandable_segments:True,garbage_collection_threshold:0.9 \
     -e PYTHONPATH=/app/src:/app/vendor/TRELLIS.2 \
     ${HF_TOKEN:+-e HF_TOKEN="$HF_TOKEN"} \
     $ENV_ARGS \
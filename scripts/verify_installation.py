@@ -6,9 +6,15 @@ Checks all dependencies and system requirements.
 
 import sys
 import os
+import json
+import time
 from pathlib import Path
 import importlib.util
 
+# Successful Hugging Face model lookups are cached here for a day
+MODEL_INFO_CACHE = Path.home() / ".cache" / "trellis2_unity_studio" / "model_info.json"
+MODEL_INFO_TTL = 24 * 3600
+
 # Colors for terminal output
 class Colors:
     GREEN = '\033[92m'
@@ -41,26 +47,36 @@ def check_module(module_name, display_name=None):
     if display_name is None:
         display_name = module_name
     
+    # find_spec locates the module without executing its import side effects
+    found = importlib.util.find_spec(module_name) is not None
+    print_check(display_name, found, "installed" if found else "NOT FOUND")
+    return found
+
+def import_torch():
+    """Import PyTorch once for every check that needs it. Returns None if missing."""
     try:
-        importlib.import_module(module_name)
-        print_check(display_name, True, "installed")
-        return True
+        import torch
     except ImportError:
-        print_check(display_name, False, "NOT FOUND")
-        return False
+        print_check("PyTorch", False, "NOT FOUND")
+        return None
+    print_check("PyTorch", True, f"installed ({torch.__version__})")
+    return torch
 
-def check_cuda():
+def check_cuda(torch):
     """Check CUDA availability."""
+    if torch is None:
+        print_check("CUDA Support", False, "PyTorch not installed")
+        return False
     try:
-        import torch
-        cuda_available = torch.cuda.is_available()
-        if cuda_available:
-            device_count = torch.cuda.device_count()
-            device_name = torch.cuda.get_device_name(0)
+        # Skip device enumeration entirely when no usable driver is present
+        driver_ok = getattr(torch._C, "_cuda_isDriverSufficient", lambda: True)()
+        device_count = torch.cuda.device_count() if driver_ok else 0
+        if device_count > 0:
+            props = torch.cuda.get_device_properties(0)
             cuda_version = torch.version.cuda
-            memory_gb = torch.cuda.get_device_properties(0).total_memory / 1e9
+            memory_gb = props.total_memory / 1e9
             
-            details = f"{device_name} ({memory_gb:.1f}GB, CUDA {cuda_version})"
+            details = f"{props.name} ({memory_gb:.1f}GB, CUDA {cuda_version})"
             print_check("CUDA Support", True, details)
             
             # Warn if low memory
@@ -75,7 +91,7 @@ def check_cuda():
         print_check("CUDA Support", False, f"Error: {e}")
         return False
 
-def check_vendor_setup():
+def check_vendor_setup(torch_ok=True):
     """Check if vendor/TRELLIS.2 is set up."""
     vendor_path = Path(__file__).parent.parent / "vendor" / "TRELLIS.2"
     
@@ -85,6 +101,11 @@ def check_vendor_setup():
         print(f"  {Colors.YELLOW}Run: git submodule update --init --recursive{Colors.END}")
         return False
     
+    # trellis2 imports torch; don't attempt it when torch itself is missing
+    if not torch_ok:
+        print_check("TRELLIS.2 Package", False, "Requires PyTorch")
+        return False
+    
     # Check if Python package is importable
     sys.path.insert(0, str(vendor_path))
     try:
@@ -119,16 +140,38 @@ def check_directories():
     
     return all_exist
 
+def _model_access_cached(model_id):
+    """Return True if model_id was reachable within the last MODEL_INFO_TTL seconds."""
+    try:
+        if time.time() - MODEL_INFO_CACHE.stat().st_mtime > MODEL_INFO_TTL:
+            return False
+        return model_id in json.loads(MODEL_INFO_CACHE.read_text())
+    except (OSError, ValueError):
+        return False
+
+def _cache_model_access(model_id):
+    """Record a successful model lookup; cache write failures are ignored."""
+    try:
+        MODEL_INFO_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        MODEL_INFO_CACHE.write_text(json.dumps([model_id]))
+    except OSError:
+        pass
+
 def check_model_access():
     """Check if models can be accessed from Hugging Face."""
+    model_id = "microsoft/TRELLIS.2-4B"
+    if _model_access_cached(model_id):
+        print_check("Model Access", True, f"{model_id} (cached)")
+        return True
+    
     try:
         from huggingface_hub import HfApi
         api = HfApi()
-        model_id = "microsoft/TRELLIS.2-4B"
         
         # Check if model exists and is accessible
         try:
-            model_info = api.model_info(model_id)
+            api.model_info(model_id, timeout=3)
+            _cache_model_access(model_id)
             print_check("Model Access", True, f"{model_id}")
             return True
         except Exception:
@@ -150,12 +193,13 @@ def main():
     # Critical checks
     print(f"\n{Colors.BOLD}Critical Components:{Colors.END}")
     results['critical'].append(check_python_version())
-    results['critical'].append(check_module('torch', 'PyTorch'))
+    torch = import_torch()
+    results['critical'].append(torch is not None)
     results['critical'].append(check_module('gradio', 'Gradio'))
     results['critical'].append(check_module('numpy', 'NumPy'))
     results['critical'].append(check_module('PIL', 'Pillow'))
-    results['critical'].append(check_cuda())
-    results['critical'].append(check_vendor_setup())
+    results['critical'].append(check_cuda(torch))
+    results['critical'].append(check_vendor_setup(torch_ok=torch is not None))
     
     # Optional checks
     print(f"\n{Colors.BOLD}Optional Components:{Colors.END}")
@@ -6,20 +6,29 @@ Endpoints:
     POST /submit/text       - Submit text-to-3D job
     POST /submit/image      - Submit image-to-3D job
     GET  /status/{job_id}   - Get job status
+    GET  /stream/{job_id}   - Stream job status updates (server-sent events)
     GET  /result/{job_id}   - Get job result (GLB download path)
     GET  /health            - Health check
 """
-import io
+import asyncio
+import gc
 import os
+import shutil
+import sqlite3
+import tempfile
 import threading
+import time
 import uuid
-from typing import Dict, Optional, Literal
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Literal, Tuple
 
 from fastapi import FastAPI, File, HTTPException, UploadFile, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+import orjson
 from PIL import Image
 
 from trellis2_wrapper import run_text_to_3d, run_image_to_3d
@@ -28,6 +37,7 @@ app = FastAPI(
     title="TRELLIS.2 API",
     description="Text-to-3D and Image-to-3D generation using Flux + TRELLIS.2",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Allow all origins for Unity/remote access
@@ -40,9 +50,57 @@ app.add_middleware(
 )
 
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "./outputs")
-JOBS: Dict[str, Dict] = {}
+# Number of jobs allowed on the GPU at once (1 for a single GPU)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+# Job metadata is persisted here so it survives restarts. Kept out of
+# OUTPUT_DIR (served by /static-download); ~/.cache/trellis2 is a volume
+# in the Docker setup.
+JOBS_DB = os.environ.get("JOBS_DB", os.path.expanduser("~/.cache/trellis2/jobs.db"))
+# Uploaded images wait here until their job runs. Only queued jobs own files
+# in it, and those are failed on restart, so it is emptied at startup.
+UPLOAD_DIR = os.environ.get(
+    "UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "trellis2-uploads")
+)
+# At most MAX_JOBS jobs are cached in memory; finished jobs and their
+# outputs are deleted after JOB_TTL_SECONDS
+MAX_JOBS = int(os.environ.get("MAX_JOBS", "512"))
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", str(24 * 3600)))
+JOB_SWEEP_INTERVAL = 300
+# Minimum seconds between explicit garbage collections after finished jobs
+GC_INTERVAL = 60.0
+_last_gc = 0.0
+
+# In-memory cache of recent jobs, insertion-ordered so the oldest is first
+JOBS: "OrderedDict[str, Dict]" = OrderedDict()
+_JOBS_LOCK = threading.Lock()
+TERMINAL_STATUSES = ("done", "failed")
+# Per-job wakeup events for /stream subscribers (kept out of JOBS so it stays JSON-serializable)
+JOB_EVENTS: Dict[str, asyncio.Event] = {}
+_EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(os.path.dirname(os.path.abspath(JOBS_DB)), exist_ok=True)
+
+_db = sqlite3.connect(JOBS_DB, check_same_thread=False)
+_DB_LOCK = threading.Lock()
+_db.execute("PRAGMA journal_mode=WAL")
+_db.execute("PRAGMA synchronous=NORMAL")
+_db.executescript("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        type TEXT,
+        status TEXT,
+        stage TEXT,
+        created_at REAL,
+        payload BLOB
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+    CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+""")
+
+# Direct static access to outputs for browser clients; Unity uses /download
+app.mount("/static-download", StaticFiles(directory=OUTPUT_DIR), name="downloads")
 
 
 def _as_download_path(path: str) -> str:
@@ -52,6 +110,166 @@ def _as_download_path(path: str) -> str:
     return f"download/{normalized}"
 
 
+def _looks_like_image(data: bytes) -> bool:
+    """Cheap PNG/JPEG/WebP signature check; full decoding happens in the worker."""
+    return (
+        data.startswith(b"\x89PNG\r\n\x1a\n")
+        or data.startswith(b"\xff\xd8\xff")
+        or (data[:4] == b"RIFF" and data[8:12] == b"WEBP")
+    )
+
+
+def _spool_upload(source) -> str:
+    """Copy an upload stream to a file in UPLOAD_DIR for the worker; returns its path."""
+    fd, path = tempfile.mkstemp(prefix="trellis2-upload-", dir=UPLOAD_DIR)
+    with os.fdopen(fd, "wb") as dest:
+        shutil.copyfileobj(source, dest, length=1 << 20)
+    return path
+
+
+def _notify_job(job_id: str, final: bool = False) -> None:
+    """
+    Wake /stream and long-poll subscribers of a job. Safe to call from worker
+    threads. A final notification (job done or failed) drops the job's event.
+    """
+    if _EVENT_LOOP is None or job_id not in JOB_EVENTS:
+        return
+
+    def _wake():
+        if final:
+            event = JOB_EVENTS.pop(job_id, None)
+        else:
+            event = JOB_EVENTS.get(job_id)
+            if event is not None:
+                # Swap in a fresh event so each subscriber waits on the state it last saw
+                JOB_EVENTS[job_id] = asyncio.Event()
+        if event is not None:
+            event.set()
+
+    _EVENT_LOOP.call_soon_threadsafe(_wake)
+
+
+def _save_job(job: Dict) -> None:
+    """Write a job's current state through to the database."""
+    row = (
+        job["job_id"],
+        job.get("type"),
+        job.get("status"),
+        job.get("stage"),
+        job.get("created_at"),
+        orjson.dumps(job),
+    )
+    with _DB_LOCK, _db:
+        _db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)", row)
+
+
+def _load_job(job_id: str) -> Optional[Dict]:
+    """Return a job from the in-memory cache, falling back to the database."""
+    job = JOBS.get(job_id)
+    if job is not None:
+        return job
+    with _DB_LOCK:
+        row = _db.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return orjson.loads(row[0]) if row else None
+
+
+def _publish_job(job: Dict) -> None:
+    """Persist a job's state and wake its /stream subscribers."""
+    # A job deleted mid-run must not be written back to the database
+    if job["job_id"] in JOBS:
+        _save_job(job)
+    _notify_job(job["job_id"], final=job.get("status") in TERMINAL_STATUSES)
+
+
+def _subscribe(job_id: str) -> Tuple[Optional[Dict], Optional[asyncio.Event]]:
+    """
+    Load a job and, while it is still queued or running, register a wakeup
+    event for it. The job is re-read after registering so a change in between
+    is not missed. Returns (job, event); event is None for missing or
+    finished jobs, which never leave an event behind.
+    """
+    job = _load_job(job_id)
+    if job is None or job.get("status") in TERMINAL_STATUSES:
+        return job, None
+    event = JOB_EVENTS.setdefault(job_id, asyncio.Event())
+    job = _load_job(job_id)
+    if job is None or job.get("status") in TERMINAL_STATUSES:
+        # Finished in between: release anyone else waiting on this event too,
+        # in case the final notification already went out
+        event.set()
+        if JOB_EVENTS.get(job_id) is event:
+            del JOB_EVENTS[job_id]
+        return job, None
+    return job, event
+
+
+def _remove_job_outputs(job_id: str) -> None:
+    """Delete a job's output directory and any stream wakeup state."""
+    JOB_EVENTS.pop(job_id, None)
+    output_path = os.path.join(OUTPUT_DIR, job_id)
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path, ignore_errors=True)
+
+
+def _trim_job_cache() -> None:
+    """
+    Drop the oldest finished jobs from memory while JOBS exceeds MAX_JOBS.
+    They stay in the database and are reloaded on demand.
+    """
+    with _JOBS_LOCK:
+        excess = len(JOBS) - MAX_JOBS
+        for job_id, job in list(JOBS.items()):
+            if excess <= 0:
+                break
+            if job.get("status") in TERMINAL_STATUSES:
+                del JOBS[job_id]
+                JOB_EVENTS.pop(job_id, None)
+                excess -= 1
+
+
+def _expire_jobs(max_age: float) -> None:
+    """Delete finished jobs older than max_age seconds, along with their outputs."""
+    cutoff = time.time() - max_age
+    with _DB_LOCK, _db:
+        expired = [
+            row[0] for row in _db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND created_at < ?",
+                (cutoff,),
+            )
+        ]
+        _db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in expired])
+
+    with _JOBS_LOCK:
+        for job_id in expired:
+            JOBS.pop(job_id, None)
+    for job_id in expired:
+        _remove_job_outputs(job_id)
+
+
+def _fail_interrupted_jobs() -> None:
+    """Mark jobs left queued or running by a previous server process as failed."""
+    with _DB_LOCK:
+        rows = _db.execute(
+            "SELECT payload FROM jobs WHERE status NOT IN ('done', 'failed')"
+        ).fetchall()
+    for (payload,) in rows:
+        job = orjson.loads(payload)
+        job["status"] = "failed"
+        job["stage"] = "error"
+        job["error"] = "Server restarted before the job finished"
+        _save_job(job)
+
+
+def _clear_upload_dir() -> None:
+    """Delete uploads spooled for jobs that a previous server process never ran."""
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_file():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
 # =============================================================================
 # Request/Response Models
 # =============================================================================
@@ -94,18 +312,35 @@ class JobStatus(BaseModel):
 # Job Runner
 # =============================================================================
 
-def _run_job(job_id: str, image_data: Optional[bytes] = None) -> None:
+def _maybe_collect_garbage() -> None:
+    """Run a full gc pass after a job, at most once per GC_INTERVAL seconds."""
+    global _last_gc
+    now = time.time()
+    if now - _last_gc >= GC_INTERVAL:
+        _last_gc = now
+        gc.collect()
+
+
+def _run_job(job_id: str, image_path: Optional[str] = None) -> None:
     """Background job runner."""
-    job = JOBS[job_id]
+    job = JOBS.get(job_id)
+    if job is None:
+        # Deleted while still queued
+        if image_path:
+            os.remove(image_path)
+        return
+
     job["status"] = "running"
     job["stage"] = "starting"
     job["stage_description"] = "Starting job"
+    _publish_job(job)
+    # The wrapper creates the directory when it starts writing outputs
     output_path = os.path.join(OUTPUT_DIR, job_id)
-    os.makedirs(output_path, exist_ok=True)
 
     def _on_progress(stage: str, description: str):
         job["stage"] = stage
         job["stage_description"] = description
+        _publish_job(job)
 
     try:
         if job["type"] == "text":
@@ -124,22 +359,38 @@ def _run_job(job_id: str, image_data: Optional[bytes] = None) -> None:
             job["timings"] = result.timings
 
         elif job["type"] == "image":
-            if image_data is None:
+            if image_path is None:
                 raise RuntimeError("Image data missing for job")
 
-            image = Image.open(io.BytesIO(image_data))
-            image.load()
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            result = run_image_to_3d(
-                image=image,
-                output_dir=output_path,
-                output_name="model",
-                quality=job.get("quality", "balanced"),
-                seed=job.get("seed", 42),
-                on_progress=_on_progress,
-            )
+            # convert() decodes on its own, so only load() explicitly when already RGB.
+            # The opened file is closed here unless it becomes the job's image,
+            # so a corrupt upload that fails to decode doesn't leak it.
+            source = None
+            try:
+                source = Image.open(image_path)
+                if source.mode != "RGB":
+                    image = source.convert("RGB")
+                else:
+                    source.load()
+                    image, source = source, None
+            finally:
+                if source is not None:
+                    source.close()
+                os.remove(image_path)
+
+            # Release the decoded pixels as soon as generation is done with them
+            try:
+                result = run_image_to_3d(
+                    image=image,
+                    output_dir=output_path,
+                    output_name="model",
+                    quality=job.get("quality", "balanced"),
+                    seed=job.get("seed", 42),
+                    on_progress=_on_progress,
+                )
+            finally:
+                image.close()
+                del image
             job["result"] = {
                 "glb": _as_download_path(result.glb_path),
             }
@@ -159,13 +410,39 @@ def _run_job(job_id: str, image_data: Optional[bytes] = None) -> None:
         import traceback
         traceback.print_exc()
 
+    finally:
+        _publish_job(job)
+        _maybe_collect_garbage()
+
 
-def _enqueue_job(job_payload: Dict, worker_args: tuple = ()) -> str:
+async def _job_worker() -> None:
+    """Pull jobs off the queue and run them one at a time in the executor."""
+    loop = asyncio.get_running_loop()
+    while True:
+        job_id, worker_args = await app.state.job_queue.get()
+        try:
+            await loop.run_in_executor(app.state.job_executor, _run_job, job_id, *worker_args)
+        finally:
+            app.state.job_queue.task_done()
+
+
+async def _expire_jobs_periodically() -> None:
+    """Evict finished jobs older than JOB_TTL_SECONDS every few minutes."""
+    while True:
+        await asyncio.sleep(JOB_SWEEP_INTERVAL)
+        await asyncio.to_thread(_expire_jobs, JOB_TTL_SECONDS)
+
+
+async def _enqueue_job(job_payload: Dict, worker_args: tuple = ()) -> str:
     """Enqueue a job for background processing."""
     job_id = str(uuid.uuid4())
     job_payload["job_id"] = job_id
-    JOBS[job_id] = job_payload
-    threading.Thread(target=_run_job, args=(job_id, *worker_args), daemon=True).start()
+    job_payload["created_at"] = time.time()
+    _save_job(job_payload)
+    with _JOBS_LOCK:
+        JOBS[job_id] = job_payload
+    _trim_job_cache()
+    await app.state.job_queue.put((job_id, worker_args))
     return job_id
 
 
@@ -173,14 +450,14 @@ def _enqueue_job(job_payload: Dict, worker_args: tuple = ()) -> str:
 # API Endpoints
 # =============================================================================
 
-@app.get("/health")
+@app.api_route("/health", methods=["GET", "HEAD"])
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "trellis2"}
 
 
 @app.post("/submit/text", response_model=JobResponse)
-def submit_text(request: TextSubmitRequest):
+async def submit_text(request: TextSubmitRequest):
     """
     Submit a text-to-3D generation job.
 
@@ -191,7 +468,7 @@ def submit_text(request: TextSubmitRequest):
     if not prompt:
         raise HTTPException(status_code=400, detail="prompt must not be empty")
 
-    job_id = _enqueue_job({
+    job_id = await _enqueue_job({
         "type": "text",
         "prompt": prompt,
         "quality": request.quality,
@@ -216,18 +493,19 @@ async def submit_image(
     if not file.filename:
         raise HTTPException(status_code=400, detail="no file provided")
 
-    image_data = await file.read()
-    if not image_data:
+    header = await file.read(12)
+    if not header:
         raise HTTPException(status_code=400, detail="empty file")
 
-    # Validate it's a valid image
-    try:
-        img = Image.open(io.BytesIO(image_data))
-        img.verify()
-    except Exception:
+    # Sniff the header only; decoding is deferred to the worker thread
+    if not _looks_like_image(header):
         raise HTTPException(status_code=400, detail="invalid image file")
 
-    job_id = _enqueue_job(
+    # Hand the worker a file on disk rather than holding the upload in memory
+    await file.seek(0)
+    image_path = await asyncio.to_thread(_spool_upload, file.file)
+
+    job_id = await _enqueue_job(
         {
             "type": "image",
             "filename": file.filename,
@@ -235,25 +513,66 @@ async def submit_image(
             "seed": seed,
             "status": "queued",
         },
-        worker_args=(image_data,),
+        worker_args=(image_path,),
     )
     return {"job_id": job_id, "status": "queued"}
 
 
 @app.get("/status/{job_id}")
-def get_status(job_id: str):
+async def get_status(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=30, description="Seconds to wait for a change"),
+):
     """
     Get the status of a job.
 
     Returns job details including status (queued, running, done, failed),
-    and result/error information when available.
+    and result/error information when available. With wait > 0 the request
+    is held until the job's stage changes or the wait elapses (long-polling).
     """
-    job = JOBS.get(job_id)
+    if wait > 0:
+        job, event = _subscribe(job_id)
+    else:
+        job, event = _load_job(job_id), None
     if job is None:
-        return JSONResponse(status_code=404, content={"error": "job not found"})
+        return ORJSONResponse(status_code=404, content={"error": "job not found"})
+
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
+        job = _load_job(job_id) or job
     return job
 
 
+@app.get("/stream/{job_id}")
+async def stream_status(job_id: str):
+    """
+    Stream status updates for a job as server-sent events.
+
+    Each event carries the same payload as /status/{job_id}. The stream
+    closes once the job reaches 'done' or 'failed'.
+    """
+    job, event = _subscribe(job_id)
+    if job is None:
+        return ORJSONResponse(status_code=404, content={"error": "job not found"})
+
+    async def _events():
+        nonlocal job, event
+        while job is not None:
+            yield b"data: " + orjson.dumps(job) + b"\n\n"
+            if event is None:
+                break
+            try:
+                await asyncio.wait_for(event.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+            job, event = _subscribe(job_id)
+
+    return StreamingResponse(_events(), media_type="text/event-stream")
+
+
 @app.get("/result/{job_id}")
 def get_result(job_id: str):
     """
@@ -262,11 +581,11 @@ def get_result(job_id: str):
     Returns download URLs for generated files (GLB, image).
     Only available when job status is 'done'.
     """
-    job = JOBS.get(job_id)
+    job = _load_job(job_id)
     if job is None:
-        return JSONResponse(status_code=404, content={"error": "job not found"})
+        return ORJSONResponse(status_code=404, content={"error": "job not found"})
     if job.get("status") != "done":
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=202,
             content={"error": "job not ready", "status": job.get("status")}
         )
@@ -282,11 +601,16 @@ def list_jobs(
     limit: int = Query(default=50, le=100),
 ):
     """List recent jobs, optionally filtered by status."""
-    jobs = list(JOBS.values())
+    # Both forms walk an index newest-first and stop after `limit` rows
+    query = "SELECT payload FROM jobs"
+    params: tuple = ()
     if status:
-        jobs = [j for j in jobs if j.get("status") == status]
-    # Return most recent first
-    jobs = sorted(jobs, key=lambda x: x.get("job_id", ""), reverse=True)[:limit]
+        query += " WHERE status = ?"
+        params = (status,)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    with _DB_LOCK:
+        rows = _db.execute(query, (*params, limit)).fetchall()
+    jobs = [orjson.loads(payload) for (payload,) in rows]
     return {"jobs": jobs, "total": len(jobs)}
 
 
@@ -296,35 +620,35 @@ def download_file(job_id: str, filename: str):
     Download a generated file (GLB or image).
     This endpoint goes through CORS middleware unlike StaticFiles.
     """
-    from fastapi.responses import FileResponse
-
     # Sanitize filename to prevent path traversal
     safe_filename = os.path.basename(filename)
     file_path = os.path.join(OUTPUT_DIR, job_id, safe_filename)
 
-    if not os.path.exists(file_path):
-        return JSONResponse(status_code=404, content={"error": "file not found"})
+    # A single stat both checks existence and is reused by FileResponse
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        return ORJSONResponse(status_code=404, content={"error": "file not found"})
 
     return FileResponse(
         file_path,
         filename=safe_filename,
         media_type="application/octet-stream",
+        stat_result=stat_result,
     )
 
 
 @app.delete("/jobs/{job_id}")
 def delete_job(job_id: str):
     """Delete a job and its outputs."""
-    if job_id not in JOBS:
-        return JSONResponse(status_code=404, content={"error": "job not found"})
-
-    job = JOBS.pop(job_id)
+    with _JOBS_LOCK:
+        JOBS.pop(job_id, None)
+    with _DB_LOCK, _db:
+        deleted = _db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount
+    if not deleted:
+        return ORJSONResponse(status_code=404, content={"error": "job not found"})
 
-    # Clean up output directory
-    output_path = os.path.join(OUTPUT_DIR, job_id)
-    if os.path.exists(output_path):
-        import shutil
-        shutil.rmtree(output_path, ignore_errors=True)
+    _remove_job_outputs(job_id)
 
     return {"deleted": job_id}
 
@@ -336,14 +660,41 @@ def delete_job(job_id: str):
 @app.on_event("startup")
 async def startup_event():
     """Log startup information."""
+    global _EVENT_LOOP
+    _EVENT_LOOP = asyncio.get_running_loop()
+    _fail_interrupted_jobs()
+    _clear_upload_dir()
+
+    # Jobs are serialized through a queue drained by a fixed pool of workers
+    app.state.job_queue = asyncio.Queue()
+    app.state.job_executor = ThreadPoolExecutor(
+        max_workers=JOB_WORKERS, thread_name_prefix="trellis2-job"
+    )
+    app.state.job_workers = [
+        asyncio.create_task(_job_worker()) for _ in range(JOB_WORKERS)
+    ]
+    app.state.job_sweeper = asyncio.create_task(_expire_jobs_periodically())
+
     print("=" * 60)
     print("TRELLIS.2 API Server")
     print("=" * 60)
     print(f"Output directory: {OUTPUT_DIR}")
+    print(f"Job workers: {JOB_WORKERS}")
+    print(f"Job database: {JOBS_DB} ({JOB_TTL_SECONDS / 3600:.0f}h TTL)")
     print("Endpoints:")
     print("  POST /submit/text   - Text-to-3D")
     print("  POST /submit/image  - Image-to-3D")
     print("  GET  /status/{id}   - Job status")
+    print("  GET  /stream/{id}   - Job status stream (SSE)")
     print("  GET  /result/{id}   - Job result")
     print("  GET  /health        - Health check")
     print("=" * 60)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop job workers and release the executor."""
+    for task in app.state.job_workers:
+        task.cancel()
+    app.state.job_sweeper.cancel()
+    app.state.job_executor.shutdown(wait=False)
@@ -8,66 +8,134 @@ Memory modes (set via MEMORY_MODE env var):
 """
 import os
 os.environ.setdefault('OPENCV_IO_ENABLE_OPENEXR', '1')
-os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True,garbage_collection_threshold:0.9')
 # Set attention backends to flash_attn if you have GPU support
 os.environ.setdefault('ATTN_BACKEND', 'xformers')
 os.environ.setdefault('SPARSE_ATTN_BACKEND', 'xformers')
 os.environ.setdefault('SPARSE_CONV_BACKEND', 'flex_gemm')
+# Persist torch.compile artifacts so restarts skip Inductor/Triton warm-up
+os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', os.path.expanduser('~/.cache/trellis2/inductor'))
+os.environ.setdefault('TORCHINDUCTOR_FX_GRAPH_CACHE', '1')
+os.environ.setdefault('TORCHINDUCTOR_AUTOGRAD_CACHE', '1')
 
+import functools
 import gc
+import logging
+import threading
 import time
 import psutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional, Literal, Callable
 
 import torch
+# Let cuDNN autotune conv algorithms and allow TF32 for fp32 matmuls/convs
+torch.backends.cudnn.benchmark = True
+torch.backends.cudnn.allow_tf32 = True
+torch.set_float32_matmul_precision('high')
 from PIL import Image
 from diffusers import Flux2KleinPipeline
 from trellis2.pipelines import Trellis2ImageTo3DPipeline
 import o_voxel
 
+# Module logger; verbosity via TRELLIS_LOG_LEVEL (DEBUG, INFO, WARNING, ...)
+logger = logging.getLogger('trellis2')
+logger.setLevel(os.environ.get('TRELLIS_LOG_LEVEL', 'INFO').upper())
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
 # Minimum RAM (in GB) to safely keep both models loaded
 MIN_RAM_KEEP_LOADED = 48
 
+# Minimum GPU memory (in GB) to keep the whole Flux pipeline resident next to
+# TRELLIS.2; smaller GPUs use model cpu offload even in keep_loaded mode
+MIN_VRAM_FLUX_RESIDENT = 40
+
+@dataclass(frozen=True, slots=True)
+class QualityPreset:
+    """Generation settings for one quality level."""
+    pipeline_type: str
+    inference_steps: int
+    decimation_target: int
+    texture_size: int
+    remesh: bool
+    # Sampler guidance overrides (None keeps the TRELLIS.2 default)
+    ss_guidance_strength: Optional[float] = None
+    shape_guidance_strength: Optional[float] = None
+    tex_guidance_strength: Optional[float] = None
+    use_compile: bool = False  # torch.compile TRELLIS.2 models
+    compile_flux: bool = False  # torch.compile the Flux transformer
+
+
 # Quality presets
 QUALITY_PRESETS = {
-    'superfast': {
-        'pipeline_type': '512',
-        'inference_steps': 4,
-        'decimation_target': 30000,
-        'texture_size': 512,
-        'remesh': False,
+    'superfast': QualityPreset(
+        pipeline_type='512',
+        inference_steps=4,
+        decimation_target=30000,
+        texture_size=512,
+        remesh=False,
         # Optimized sampler params for maximum speed
-        'ss_guidance_strength': 5.0,
-        'shape_guidance_strength': 5.0,
-        'tex_guidance_strength': 1.0,
-        'use_compile': True,  # torch.compile for speed
-    },
-    'fast': {
-        'pipeline_type': '512',
-        'inference_steps': 15,
-        'decimation_target': 50000,
-        'texture_size': 1024,
-        'remesh': False,
-    },
-    'balanced': {
-        'pipeline_type': '512',
-        'inference_steps': 25,
-        'decimation_target': 100000,
-        'texture_size': 2048,
-        'remesh': False,
-    },
-    'high': {
-        'pipeline_type': '1024_cascade',
-        'inference_steps': 50,
-        'decimation_target': 500000,
-        'texture_size': 4096,
-        'remesh': True,
-    },
+        ss_guidance_strength=5.0,
+        shape_guidance_strength=5.0,
+        tex_guidance_strength=1.0,
+        use_compile=True,  # torch.compile for speed
+        compile_flux=True,
+    ),
+    'fast': QualityPreset(
+        pipeline_type='512',
+        inference_steps=15,
+        decimation_target=50000,
+        texture_size=1024,
+        remesh=False,
+        compile_flux=True,
+    ),
+    'balanced': QualityPreset(
+        pipeline_type='512',
+        inference_steps=25,
+        decimation_target=100000,
+        texture_size=2048,
+        remesh=False,
+    ),
+    'high': QualityPreset(
+        pipeline_type='1024_cascade',
+        inference_steps=50,
+        decimation_target=500000,
+        texture_size=4096,
+        remesh=True,
+    ),
 }
 
 QualityLevel = Literal['superfast', 'fast', 'balanced', 'high']
 
+
+def _build_sampler_params(preset: QualityPreset) -> tuple:
+    """Build (sparse structure, shape, texture) sampler params for a preset."""
+    ss_params = {'steps': preset.inference_steps}
+    shape_params = {'steps': preset.inference_steps}
+    tex_params = {'steps': preset.inference_steps}
+
+    # Apply optimized guidance for superfast mode
+    if preset.ss_guidance_strength is not None:
+        ss_params['guidance_strength'] = preset.ss_guidance_strength
+    if preset.shape_guidance_strength is not None:
+        shape_params['guidance_strength'] = preset.shape_guidance_strength
+    if preset.tex_guidance_strength is not None:
+        tex_params['guidance_strength'] = preset.tex_guidance_strength
+
+    return ss_params, shape_params, tex_params
+
+
+# Sampler params per preset, built once. trellis.run() merges these into
+# its own defaults without mutating them, so they are shared across calls.
+SAMPLER_PARAMS = {
+    quality: _build_sampler_params(preset)
+    for quality, preset in QUALITY_PRESETS.items()
+}
+
 # Progress stages reported during generation
 STAGES = {
     'loading_flux': 'Loading Flux model',
@@ -81,6 +149,183 @@ STAGES = {
 # Callable type for progress reporting: (stage_key, stage_description) -> None
 ProgressCallback = Optional[Callable[[str, str], None]]
 
+# Background pool for file I/O that can overlap with GPU work
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trellis2-io")
+# Single worker for weight read-ahead, so a slow prefetch never holds up
+# image saves on _IO_POOL and prefetches don't pile up behind each other
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trellis2-prefetch")
+
+# TRELLIS.2 models compiled (with CUDA graphs) for presets with use_compile.
+# The flow models run once per sampler step and the structure decoder once
+# per call; the shape/texture SLAT decoders stay eager since they run once
+# on sparse inputs whose size changes with every mesh.
+_COMPILE_MODELS = (
+    'sparse_structure_flow_model',
+    'sparse_structure_decoder',
+    'shape_slat_flow_model_512',
+    'tex_slat_flow_model_512',
+)
+
+# TRELLIS.2 models run from explicit CUDA graphs with TRELLIS_CUDA_GRAPHS=1:
+# the sparse structure flow model sees the same dense latent grid every step
+_CUDA_GRAPH_MODELS = ('sparse_structure_flow_model',)
+# Input signatures captured per graphed model before falling back to eager
+_MAX_CUDA_GRAPHS = 8
+
+# TRELLIS.2 flow transformers quantized by TRELLIS_QUANT; the VAE decoders
+# stay in bf16 since mesh/texture decoding is precision sensitive
+_FP8_TRELLIS_MODELS = (
+    'sparse_structure_flow_model',
+    'shape_slat_flow_model_512',
+    'tex_slat_flow_model_512',
+)
+
+# TRELLIS.2 models with dense 3D conv weights that run faster in NDHWC layout
+_CHANNELS_LAST_3D_MODELS = ('sparse_structure_decoder', 'shape_slat_flow_model_512')
+
+# Weight file suffixes read ahead by _prefetch_model_files
+_WEIGHT_SUFFIXES = ('.safetensors', '.pt', '.pth', '.bin')
+
+
+def _prefetch_model_files(repo_id: str) -> None:
+    """
+    Read a locally cached model's weight files so they sit in the OS page
+    cache when from_pretrained() loads them. Best effort: does nothing if
+    the model has not been downloaded yet.
+    """
+    try:
+        from huggingface_hub import snapshot_download
+        local_dir = snapshot_download(repo_id, local_files_only=True)
+    except Exception:
+        return
+
+    buf = bytearray(16 << 20)
+    for root, _, files in os.walk(local_dir):
+        for name in files:
+            if name.endswith(_WEIGHT_SUFFIXES):
+                with open(os.path.join(root, name), 'rb') as f:
+                    while f.readinto(buf):
+                        pass
+
+
+def _quantize_fp8(module: torch.nn.Module, label: str) -> bool:
+    """
+    Quantize a module's linear layers in place to FP8 (dynamic activation,
+    FP8 weight) with torchao. Best effort: returns False and logs why when
+    torchao or an SM89+ GPU is unavailable.
+    """
+    if torch.cuda.get_device_capability() < (8, 9):
+        logger.warning("FP8 needs an Ada/Hopper GPU (SM89+); skipping %s quantization", label)
+        return False
+    try:
+        from torchao.quantization import quantize_, float8_dynamic_activation_float8_weight
+    except ImportError:
+        logger.warning("torchao not installed; skipping %s FP8 quantization", label)
+        return False
+    try:
+        quantize_(module, float8_dynamic_activation_float8_weight())
+        return True
+    except Exception as e:
+        logger.warning("%s FP8 quantization failed (continuing without): %s", label, e)
+        return False
+
+
+class _GraphedModule(torch.nn.Module):
+    """
+    Replays a module's forward from CUDA graphs captured once per input
+    signature (shapes, dtypes and non-tensor args). Only valid for modules
+    whose weights stay on the GPU and whose forward is shape-static, like
+    the dense sparse structure flow model; anything else, including
+    signatures whose capture fails, runs eagerly.
+    """
+
+    def __init__(self, module: torch.nn.Module):
+        super().__init__()
+        self.module = module
+        self._graphs = {}
+        # Signatures that failed to capture; always run eagerly
+        self._eager_keys = set()
+        # Memory pool shared by all of this module's graphs (created on first
+        # capture). They never replay concurrently and every replay's outputs
+        # are cloned straight away, so one graph may reuse another's memory.
+        self._pool = None
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's attributes (resolution, dtype, ...)
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            if name == 'module':
+                raise
+            return getattr(self.module, name)
+
+    def forward(self, *args, **kwargs):
+        flat, spec = torch.utils._pytree.tree_flatten((args, kwargs))
+        if not all(t.is_cuda for t in flat if isinstance(t, torch.Tensor)):
+            return self.module(*args, **kwargs)
+        key = tuple(
+            (tuple(t.shape), t.dtype) if isinstance(t, torch.Tensor) else t for t in flat
+        )
+        try:
+            entry = self._graphs.get(key)
+        except TypeError:  # unhashable non-tensor argument
+            return self.module(*args, **kwargs)
+
+        if entry is None:
+            # Skip signatures that failed to capture, and bound graph memory
+            # if callers keep changing signatures
+            if key in self._eager_keys or len(self._graphs) >= _MAX_CUDA_GRAPHS:
+                return self.module(*args, **kwargs)
+            try:
+                entry = self._capture(flat, spec)
+            except Exception as e:
+                if not self._eager_keys:
+                    logger.warning(
+                        "CUDA graph capture of %s failed (running eagerly): %s",
+                        type(self.module).__name__, e,
+                    )
+                self._eager_keys.add(key)
+                return self.module(*args, **kwargs)
+            self._graphs[key] = entry
+        graph, static_in, static_out = entry
+
+        for dst, src in zip(static_in, flat):
+            if isinstance(src, torch.Tensor):
+                dst.copy_(src)
+        graph.replay()
+        # Outputs live in the graph's pool and are overwritten on next replay
+        return torch.utils._pytree.tree_map(
+            lambda t: t.clone() if isinstance(t, torch.Tensor) else t, static_out
+        )
+
+    def _capture(self, flat: list, spec) -> tuple:
+        static_in = [t.clone() if isinstance(t, torch.Tensor) else t for t in flat]
+        args, kwargs = torch.utils._pytree.tree_unflatten(static_in, spec)
+
+        # Warm up on a side stream so lazy init (cuBLAS handles, autotuning)
+        # happens outside the capture
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(3):
+                self.module(*args, **kwargs)
+        torch.cuda.current_stream().wait_stream(stream)
+
+        # Export of a previous job may still be issuing CUDA work from another
+        # thread: drain it, then capture on our own stream in thread_local mode
+        # so that thread's allocations and syncs neither invalidate the
+        # capture nor leak into the graph
+        torch.cuda.synchronize()
+        if self._pool is None:
+            self._pool = torch.cuda.graph_pool_handle()
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(
+            graph, pool=self._pool, stream=stream, capture_error_mode="thread_local"
+        ):
+            static_out = self.module(*args, **kwargs)
+        logger.debug("Captured CUDA graph for %s", type(self.module).__name__)
+        return graph, static_in, static_out
+
 
 @dataclass
 class InferenceResult:
@@ -95,17 +340,35 @@ def _detect_memory_mode() -> str:
     mode = os.environ.get('MEMORY_MODE', 'auto')
     if mode in ('keep_loaded', 'swap'):
         return mode
+    return _memory_mode_from_ram()
+
 
-    # Auto-detect based on available RAM
+@functools.lru_cache(maxsize=1)
+def _memory_mode_from_ram() -> str:
+    """Pick a memory mode from total system RAM (probed once per process)."""
     total_ram_gb = psutil.virtual_memory().total / (1024 ** 3)
     if total_ram_gb >= MIN_RAM_KEEP_LOADED:
-        print(f"[INFO] Detected {total_ram_gb:.0f}GB RAM -> keep_loaded mode")
+        logger.info("Detected %.0fGB RAM -> keep_loaded mode", total_ram_gb)
         return 'keep_loaded'
     else:
-        print(f"[INFO] Detected {total_ram_gb:.0f}GB RAM (< {MIN_RAM_KEEP_LOADED}GB) -> swap mode")
+        logger.info(
+            "Detected %.0fGB RAM (< %dGB) -> swap mode", total_ram_gb, MIN_RAM_KEEP_LOADED
+        )
         return 'swap'
 
 
+def _flux_fits_on_gpu(device: str) -> bool:
+    """
+    Whether Flux can stay on the GPU alongside TRELLIS.2, judged from total
+    GPU memory. TRELLIS_FLUX_RESIDENT=1/0 forces the choice.
+    """
+    override = os.environ.get('TRELLIS_FLUX_RESIDENT')
+    if override in ('0', '1'):
+        return override == '1'
+    total_gb = torch.cuda.get_device_properties(torch.device(device)).total_memory / (1024 ** 3)
+    return total_gb >= MIN_VRAM_FLUX_RESIDENT
+
+
 class Trellis2Pipeline:
     """
     Combined Flux + TRELLIS.2 pipeline for text-to-3D and image-to-3D.
@@ -136,6 +399,30 @@ class Trellis2Pipeline:
 
         self._flux_pipe: Optional[Flux2KleinPipeline] = None
         self._trellis_pipe: Optional[Trellis2ImageTo3DPipeline] = None
+        # Reseeded per call instead of allocating a new CUDA generator each time
+        self._generator = torch.Generator(device=device)
+        # Serializes lazy model loads/compiles so concurrent first requests
+        # don't each call from_pretrained
+        self._load_lock = threading.Lock()
+        # Held while models are swapped and sampled; GLB export runs outside
+        # it so with several job workers one job's export overlaps the next
+        # job's generation
+        self._gpu_lock = threading.Lock()
+        # Model currently holding GPU memory in swap mode ('flux', 'trellis' or None)
+        self._active: Optional[str] = None
+        # Pending TRELLIS.2 weight read-ahead (swap mode), guarded by _gpu_lock
+        self._prefetch_future: Optional[Future] = None
+        # TRELLIS.2 low_vram moves each sub-model to the GPU only while it runs.
+        # Fixed for the pipeline's lifetime: the moves change weight addresses,
+        # which makes compiled CUDA graphs re-record, so disable it
+        # (TRELLIS_LOW_VRAM=0) when VRAM allows.
+        self.low_vram = os.environ.get('TRELLIS_LOW_VRAM', '1') != '0'
+        # Flux transformer quantization ('fp8': torchao, SM89+). Applied once
+        # at load, before any compile, so every preset runs the same weights.
+        self.flux_quant = os.environ.get('TRELLIS_FLUX_QUANT') or None
+        # Same for the TRELLIS.2 flow models, applied before CUDA graph capture
+        # and compile
+        self.trellis_quant = os.environ.get('TRELLIS_QUANT') or None
 
         # Determine memory strategy
         if memory_mode == "auto":
@@ -143,7 +430,7 @@ class Trellis2Pipeline:
         else:
             self.memory_mode = memory_mode
 
-        print(f"[INFO] Memory mode: {self.memory_mode}")
+        logger.info("Memory mode: %s", self.memory_mode)
 
         if self.memory_mode == 'keep_loaded':
             # In keep_loaded mode, preload both models
@@ -154,64 +441,200 @@ class Trellis2Pipeline:
         else:
             # In swap mode, don't preload - models are loaded on demand
             # to avoid having both in memory simultaneously
-            print("[INFO] Swap mode: models will be loaded on demand.")
+            logger.info("Swap mode: models will be loaded on demand.")
 
-    def _load_flux(self) -> Flux2KleinPipeline:
+    def _load_flux(self, use_compile: bool = False) -> Flux2KleinPipeline:
         """Load Flux pipeline (lazy loading)."""
         if self._flux_pipe is None:
-            print("[INFO] Loading Flux pipeline...")
-            self._flux_pipe = Flux2KleinPipeline.from_pretrained(
-                self.flux_model,
-                torch_dtype=self.dtype
-            )
-            self._flux_pipe.enable_model_cpu_offload()
-            print("[INFO] Flux pipeline loaded.")
+            with self._load_lock:
+                if self._flux_pipe is None:
+                    logger.info("Loading Flux pipeline...")
+                    flux_pipe = Flux2KleinPipeline.from_pretrained(
+                        self.flux_model,
+                        torch_dtype=self.dtype
+                    )
+                    flux_pipe.vae.to(memory_format=torch.channels_last)
+                    # Offload unless both RAM (keep_loaded) and VRAM leave room;
+                    # resident weights skip the per-forward CPU<->GPU hook traffic
+                    self._flux_offloaded = (
+                        self.memory_mode == 'swap' or not _flux_fits_on_gpu(self.device)
+                    )
+                    if self._flux_offloaded:
+                        flux_pipe.enable_model_cpu_offload()
+                    else:
+                        flux_pipe.to(self.device)
+                    if self.flux_quant:
+                        self._quantize_flux(flux_pipe)
+                    # Publish only once fully set up so unlocked readers never
+                    # see a half-initialized pipeline
+                    self._flux_pipe = flux_pipe
+                    logger.info("Flux pipeline loaded.")
+
+        # Compile the transformer for fast presets (cached after first run).
+        # Only when resident: offloaded weights (always the case in swap mode,
+        # which also reloads Flux every job) rule out CUDA graphs, so the
+        # compile would cost time without speeding anything up.
+        if (
+            use_compile
+            and not self._flux_offloaded
+            and not getattr(self, '_flux_compiled', False)
+        ):
+            with self._load_lock:
+                if not getattr(self, '_flux_compiled', False):
+                    try:
+                        logger.info("Compiling Flux transformer with torch.compile...")
+                        # Options apply to this compile only, so TRELLIS.2's
+                        # compiles keep Inductor's defaults; triton.cudagraphs
+                        # is what mode='reduce-overhead' sets
+                        self._flux_pipe.transformer.compile(
+                            dynamic=False,
+                            options={
+                                'triton.cudagraphs': True,
+                                'conv_1x1_as_mm': True,
+                                'coordinate_descent_tuning': True,
+                            },
+                        )
+                        self._flux_compiled = True
+                        logger.info("Flux transformer compiled.")
+                    except Exception as e:
+                        logger.warning("Flux torch.compile failed (continuing without): %s", e)
+
         return self._flux_pipe
 
+    def _quantize_flux(self, flux_pipe: Flux2KleinPipeline):
+        """Quantize a freshly loaded Flux transformer in place with torchao (best effort)."""
+        if self.flux_quant != 'fp8':
+            logger.warning("Unknown TRELLIS_FLUX_QUANT %r (continuing unquantized)", self.flux_quant)
+            return
+        logger.info("Quantizing Flux transformer to FP8...")
+        if _quantize_fp8(flux_pipe.transformer, 'Flux transformer'):
+            logger.info("Flux transformer quantized.")
+
+    def _quantize_trellis(self, models: dict):
+        """Quantize freshly loaded TRELLIS.2 flow models in place with torchao (best effort)."""
+        if self.trellis_quant != 'fp8':
+            logger.warning("Unknown TRELLIS_QUANT %r (continuing unquantized)", self.trellis_quant)
+            return
+        logger.info("Quantizing TRELLIS.2 flow models to FP8...")
+        quantized = [
+            name for name in _FP8_TRELLIS_MODELS
+            if name in models and _quantize_fp8(models[name], name)
+        ]
+        if quantized:
+            logger.info("Quantized to FP8: %s", ', '.join(quantized))
+
     def _load_trellis(self, use_compile: bool = False) -> Trellis2ImageTo3DPipeline:
         """Load TRELLIS.2 pipeline (lazy loading)."""
         if self._trellis_pipe is None:
-            print("[INFO] Loading TRELLIS.2 pipeline...")
-            
-            # Clear any leftover torch function mode stack from Flux cpu_offload
-            # This prevents meta tensor issues in BiRefNet model loading
-            try:
-                import torch.utils._device as _device_module
-                # Pop all modes from the torch function stack
-                while _device_module._len_torch_function_stack() > 0:
-                    _device_module._pop_mode()
-                    print("[DEBUG] Popped a torch function mode")
-            except Exception as e:
-                print(f"[DEBUG] Could not clear torch function stack: {e}")
-            
-            self._trellis_pipe = Trellis2ImageTo3DPipeline.from_pretrained(
-                self.trellis_model
-            )
-            self._trellis_pipe.cuda()
-            self._trellis_pipe.low_vram = True
-            print("[INFO] TRELLIS.2 pipeline loaded.")
-        
+            with self._load_lock:
+                if self._trellis_pipe is None:
+                    logger.info("Loading TRELLIS.2 pipeline...")
+
+                    # Clear any leftover torch function mode stack from Flux cpu_offload
+                    # This prevents meta tensor issues in BiRefNet model loading
+                    try:
+                        import torch.utils._device as _device_module
+                        # Pop all modes from the torch function stack
+                        while _device_module._len_torch_function_stack() > 0:
+                            _device_module._pop_mode()
+                            logger.debug("Popped a torch function mode")
+                    except Exception as e:
+                        logger.debug("Could not clear torch function stack: %s", e)
+
+                    # TRELLIS.2 reads each model's weights with safetensors'
+                    # memory-mapped load_file, so there is no torch.load pickle
+                    # copy to avoid; its from_pretrained takes no loader kwargs
+                    # (low_cpu_mem_usage, use_safetensors) to pass through.
+                    trellis_pipe = Trellis2ImageTo3DPipeline.from_pretrained(
+                        self.trellis_model
+                    )
+                    trellis_pipe.cuda()
+                    trellis_pipe.low_vram = self.low_vram
+                    if self.trellis_quant:
+                        self._quantize_trellis(trellis_pipe.models)
+                    # Replay the shape-static flow model from explicit CUDA graphs;
+                    # needs resident weights, so never with low_vram
+                    if os.environ.get('TRELLIS_CUDA_GRAPHS') == '1':
+                        if self.low_vram:
+                            logger.warning("TRELLIS_CUDA_GRAPHS needs TRELLIS_LOW_VRAM=0; ignoring")
+                        else:
+                            for name in _CUDA_GRAPH_MODELS:
+                                if name in trellis_pipe.models:
+                                    trellis_pipe.models[name] = _GraphedModule(
+                                        trellis_pipe.models[name]
+                                    )
+                    # Eager models stay the default; compiled variants are kept
+                    # separately and only swapped in for presets that asked
+                    self._eager_models = trellis_pipe.models
+                    self._compiled_models = None
+                    self._trellis_pipe = trellis_pipe
+                    logger.info("TRELLIS.2 pipeline loaded.")
+
+        # Swap mode unloads TRELLIS.2 (and its compiled models) for Flux on
+        # every text job, so compiling would re-trace each request; run eager
+        use_compile = use_compile and self.memory_mode != 'swap'
+
         # Apply torch.compile for superfast mode (cached after first run)
         if use_compile and not getattr(self, '_compiled', False):
-            try:
-                print("[INFO] Compiling models with torch.compile (first run will be slow)...")
-                if 'sparse_structure_flow_model' in self._trellis_pipe.models:
-                    self._trellis_pipe.models['sparse_structure_flow_model'] = torch.compile(
-                        self._trellis_pipe.models['sparse_structure_flow_model'],
-                        mode='reduce-overhead'
-                    )
-                if 'shape_slat_flow_model_512' in self._trellis_pipe.models:
-                    self._trellis_pipe.models['shape_slat_flow_model_512'] = torch.compile(
-                        self._trellis_pipe.models['shape_slat_flow_model_512'],
-                        mode='reduce-overhead'
-                    )
-                self._compiled = True
-                print("[INFO] Models compiled successfully.")
-            except Exception as e:
-                print(f"[WARN] torch.compile failed (continuing without): {e}")
-        
+            with self._load_lock:
+                if not getattr(self, '_compiled', False):
+                    try:
+                        # Reuse compiled graphs and autotuning results from previous runs
+                        torch._inductor.config.fx_graph_cache = True
+                        torch._inductor.config.autotune_local_cache = True
+                        # Let Inductor pick NDHWC layouts for the 3D conv paths
+                        torch._inductor.config.layout_optimization = True
+                        for name in _CHANNELS_LAST_3D_MODELS:
+                            if name in self._eager_models:
+                                try:
+                                    self._eager_models[name].to(
+                                        memory_format=torch.channels_last_3d
+                                    )
+                                except Exception as e:
+                                    logger.debug("channels_last_3d not applied to %s: %s", name, e)
+                        logger.info("Compiling models with torch.compile (first run will be slow)...")
+                        if self.low_vram:
+                            logger.info(
+                                "low_vram is on; CUDA graphs re-record as models move "
+                                "between CPU and GPU (TRELLIS_LOW_VRAM=0 keeps them resident)"
+                            )
+                        # torch.compile is lazy: graphs are traced on the first call,
+                        # inside _generate_mesh's inference_mode block, so they are
+                        # specialized for inference without wrapping this in it too
+                        models = dict(self._eager_models)
+                        for name in _COMPILE_MODELS:
+                            # Skip absent models and ones already replayed from CUDA graphs
+                            if name not in models or isinstance(models[name], _GraphedModule):
+                                continue
+                            try:
+                                models[name] = torch.compile(models[name], mode='reduce-overhead')
+                            except Exception as e:
+                                logger.warning("torch.compile of %s failed (left eager): %s", name, e)
+                        self._compiled_models = models
+                        self._compiled = True
+                        logger.info("Models compiled successfully.")
+                    except Exception as e:
+                        logger.warning("torch.compile failed (continuing without): %s", e)
+
+        # Compiled graphs are specialized for the compiling preset's shapes;
+        # other presets run the eager models instead of forcing recompiles
+        if use_compile and self._compiled_models is not None:
+            self._trellis_pipe.models = self._compiled_models
+        else:
+            self._trellis_pipe.models = self._eager_models
         return self._trellis_pipe
 
+    def _release_cuda_memory(self):
+        """
+        Collect an unloaded model's tensors. Freed blocks stay in PyTorch's
+        caching allocator for the next model to reuse; set
+        TRELLIS_AGGRESSIVE_EMPTY_CACHE=1 to also return them to the driver.
+        """
+        gc.collect()
+        torch.cuda.synchronize()
+        if os.environ.get('TRELLIS_AGGRESSIVE_EMPTY_CACHE') == '1':
+            torch.cuda.empty_cache()
+
     def _unload_flux(self):
         """Unload Flux to free memory."""
         if self._flux_pipe is not None:
@@ -222,8 +645,8 @@ class Trellis2Pipeline:
                 pass
             del self._flux_pipe
             self._flux_pipe = None
-            gc.collect()
-            torch.cuda.empty_cache()
+            self._flux_compiled = False
+            self._release_cuda_memory()
             
             # Reset torch device context stack to prevent meta tensor issues
             # This is needed because enable_model_cpu_offload() may leave
@@ -236,16 +659,54 @@ class Trellis2Pipeline:
             except Exception:
                 pass
             
-            print("[INFO] Flux pipeline unloaded.")
+            logger.info("Flux pipeline unloaded.")
 
     def _unload_trellis(self):
         """Unload TRELLIS.2 to free memory."""
         if self._trellis_pipe is not None:
             del self._trellis_pipe
             self._trellis_pipe = None
-            gc.collect()
-            torch.cuda.empty_cache()
-            print("[INFO] TRELLIS.2 pipeline unloaded.")
+            self._compiled = False
+            # Drop every reference to the sub-models so their weights can be freed
+            self._eager_models = None
+            self._compiled_models = None
+            self._release_cuda_memory()
+            logger.info("TRELLIS.2 pipeline unloaded.")
+
+    def warmup(self, quality: QualityLevel = 'superfast'):
+        """
+        Run a throwaway single-step TRELLIS.2 generation so allocator
+        segments, cuDNN autotuning and (for compiled presets) torch.compile
+        graphs are set up before the first real request.
+        """
+        preset = QUALITY_PRESETS[quality]
+
+        # Opaque square on a transparent background: TRELLIS.2 uses the
+        # alpha mask directly and skips background removal
+        image = Image.new('RGBA', (512, 512), (0, 0, 0, 0))
+        image.paste((128, 128, 128, 255), (128, 128, 384, 384))
+        params = {'steps': 1}
+
+        with self._gpu_lock:
+            trellis = self._load_trellis(use_compile=preset.use_compile)
+            self._active = 'trellis'
+
+            logger.info("Warming up TRELLIS.2 (%s preset)...", quality)
+            t0 = time.perf_counter()
+            try:
+                with torch.inference_mode():
+                    trellis.run(
+                        image,
+                        seed=0,
+                        pipeline_type=preset.pipeline_type,
+                        sparse_structure_sampler_params=params,
+                        shape_slat_sampler_params=params,
+                        tex_slat_sampler_params=params,
+                    )
+            except Exception as e:
+                logger.warning("Warmup run failed (continuing): %s", e)
+                return
+        logger.info("Warmup done in %.1fs", time.perf_counter() - t0)
 
     def generate_image(
         self,
@@ -254,21 +715,97 @@ class Trellis2Pipeline:
         height: int = 1024,
         width: int = 1024,
         num_inference_steps: int = 4,
+        use_compile: bool = False,
     ) -> Image.Image:
         """Generate an image from a text prompt using Flux."""
-        flux = self._load_flux()
-
-        image = flux(
-            prompt=prompt,
-            height=height,
-            width=width,
-            guidance_scale=1.0,
-            num_inference_steps=num_inference_steps,
-            generator=torch.Generator(device=self.device).manual_seed(seed)
-        ).images[0]
+        flux = self._load_flux(use_compile=use_compile)
+
+        with torch.inference_mode():
+            image = flux(
+                prompt=prompt,
+                height=height,
+                width=width,
+                guidance_scale=1.0,
+                num_inference_steps=num_inference_steps,
+                generator=self._generator.manual_seed(seed)
+            ).images[0]
 
         return image
 
+    def _generate_mesh(
+        self,
+        image: Image.Image,
+        quality: QualityLevel,
+        seed: int,
+        report: Callable[[str], None],
+        timings: dict,
+    ):
+        """Load TRELLIS.2 and sample a mesh. Caller must hold _gpu_lock."""
+        preset = QUALITY_PRESETS[quality]
+
+        # In swap mode, free Flux if an earlier call left it on the GPU
+        if self.memory_mode == 'swap' and self._active == 'flux':
+            report('unloading_flux')
+            self._unload_flux()
+
+        # Load TRELLIS.2
+        report('loading_trellis')
+        t0 = time.perf_counter()
+        trellis = self._load_trellis(use_compile=preset.use_compile)
+        self._active = 'trellis'
+        timings['trellis_load'] = time.perf_counter() - t0
+
+        ss_params, shape_params, tex_params = SAMPLER_PARAMS[quality]
+
+        # Generate 3D mesh
+        report('generating_mesh')
+        t0 = time.perf_counter()
+        with torch.inference_mode():
+            mesh = trellis.run(
+                image,
+                seed=seed,
+                pipeline_type=preset.pipeline_type,
+                sparse_structure_sampler_params=ss_params,
+                shape_slat_sampler_params=shape_params,
+                tex_slat_sampler_params=tex_params
+            )[0]
+        timings['trellis_generate'] = time.perf_counter() - t0
+        return mesh
+
+    def _export_glb(
+        self,
+        mesh,
+        quality: QualityLevel,
+        glb_path: str,
+        report: Callable[[str], None],
+        timings: dict,
+    ) -> None:
+        """Bake and write a sampled mesh to GLB. Runs outside _gpu_lock."""
+        preset = QUALITY_PRESETS[quality]
+
+        report('exporting_glb')
+        t0 = time.perf_counter()
+        # Mesh tensors are inference tensors, so postprocess in the same mode
+        with torch.inference_mode():
+            glb = o_voxel.postprocess.to_glb(
+                vertices=mesh.vertices,
+                faces=mesh.faces,
+                attr_volume=mesh.attrs,
+                coords=mesh.coords,
+                attr_layout=mesh.layout,
+                voxel_size=mesh.voxel_size,
+                aabb=[[-0.5, -0.5, -0.5], [0.5, 0.5, 0.5]],
+                decimation_target=preset.decimation_target,
+                texture_size=preset.texture_size,
+                remesh=preset.remesh,
+                remesh_band=1,
+                remesh_project=0,
+                verbose=False
+            )
+
+        glb.export(glb_path, extension_webp=False)
+        timings['export_glb'] = time.perf_counter() - t0
+
     def image_to_3d(
         self,
         image: Image.Image,
@@ -280,74 +817,18 @@ class Trellis2Pipeline:
     ) -> InferenceResult:
         """Generate a 3D model from an image using TRELLIS.2."""
         os.makedirs(output_dir, exist_ok=True)
-        preset = QUALITY_PRESETS[quality]
         timings = {}
 
         def _report(stage: str):
             if on_progress:
                 on_progress(stage, STAGES.get(stage, stage))
 
-        # Load TRELLIS.2
-        _report('loading_trellis')
-        t0 = time.time()
-        use_compile = preset.get('use_compile', False)
-        trellis = self._load_trellis(use_compile=use_compile)
-        timings['trellis_load'] = time.time() - t0
-
-        # Build sampler params (superfast uses optimized guidance values)
-        ss_params = {
-            'steps': preset['inference_steps'],
-        }
-        shape_params = {
-            'steps': preset['inference_steps'],
-        }
-        tex_params = {
-            'steps': preset['inference_steps'],
-        }
-        
-        # Apply optimized guidance for superfast mode
-        if 'ss_guidance_strength' in preset:
-            ss_params['guidance_strength'] = preset['ss_guidance_strength']
-        if 'shape_guidance_strength' in preset:
-            shape_params['guidance_strength'] = preset['shape_guidance_strength']
-        if 'tex_guidance_strength' in preset:
-            tex_params['guidance_strength'] = preset['tex_guidance_strength']
-
-        # Generate 3D mesh
-        _report('generating_mesh')
-        t0 = time.time()
-        mesh = trellis.run(
-            image,
-            seed=seed,
-            pipeline_type=preset['pipeline_type'],
-            sparse_structure_sampler_params=ss_params,
-            shape_slat_sampler_params=shape_params,
-            tex_slat_sampler_params=tex_params
-        )[0]
-        timings['trellis_generate'] = time.time() - t0
-
-        # Export GLB
-        _report('exporting_glb')
-        t0 = time.time()
-        glb = o_voxel.postprocess.to_glb(
-            vertices=mesh.vertices,
-            faces=mesh.faces,
-            attr_volume=mesh.attrs,
-            coords=mesh.coords,
-            attr_layout=mesh.layout,
-            voxel_size=mesh.voxel_size,
-            aabb=[[-0.5, -0.5, -0.5], [0.5, 0.5, 0.5]],
-            decimation_target=preset['decimation_target'],
-            texture_size=preset['texture_size'],
-            remesh=preset['remesh'],
-            remesh_band=1,
-            remesh_project=0,
-            verbose=False
-        )
+        with self._gpu_lock:
+            mesh = self._generate_mesh(image, quality, seed, _report, timings)
 
+        # Export outside the lock so another job can start sampling meanwhile
         glb_path = os.path.join(output_dir, f"{output_name}.glb")
-        glb.export(glb_path, extension_webp=False)
-        timings['export_glb'] = time.time() - t0
+        self._export_glb(mesh, quality, glb_path, _report, timings)
 
         return InferenceResult(glb_path=glb_path, timings=timings)
 
@@ -378,62 +859,75 @@ class Trellis2Pipeline:
             InferenceResult with paths to generated files and timing info
         """
         os.makedirs(output_dir, exist_ok=True)
+        preset = QUALITY_PRESETS[quality]
         timings = {}
 
         def _report(stage: str):
             if on_progress:
                 on_progress(stage, STAGES.get(stage, stage))
 
-        # In swap mode, unload TRELLIS.2 before loading Flux
-        if self.memory_mode == 'swap':
-            self._unload_trellis()
+        with self._gpu_lock:
+            # In swap mode, unload TRELLIS.2 before loading Flux, and read its
+            # weights back into the page cache while Flux runs
+            if self.memory_mode == 'swap' and self._active != 'flux':
+                self._unload_trellis()
+                if self._prefetch_future is None or self._prefetch_future.done():
+                    self._prefetch_future = _PREFETCH_POOL.submit(
+                        _prefetch_model_files, self.trellis_model
+                    )
 
-        # Generate image with Flux
-        _report('loading_flux')
-        t0 = time.time()
-        _report('generating_image')
-        image = self.generate_image(prompt, seed=seed)
-        timings['flux_generate'] = time.time() - t0
+            # Generate image with Flux
+            self._active = 'flux'
+            _report('loading_flux')
+            t0 = time.perf_counter()
+            _report('generating_image')
+            image = self.generate_image(
+                prompt,
+                seed=seed,
+                use_compile=preset.compile_flux,
+            )
+            timings['flux_generate'] = time.perf_counter() - t0
 
-        # Save image
-        image_path = os.path.join(output_dir, f"{output_name}_image.png")
-        image.save(image_path)
+            # Save image in the background while TRELLIS.2 loads and runs
+            image_path = os.path.join(output_dir, f"{output_name}_image.png")
+            # Reference artifact only: fast zlib level instead of the default 6
+            save_future = _IO_POOL.submit(
+                image.save, image_path, format='PNG', compress_level=1
+            )
 
-        # In swap mode, free Flux memory before loading TRELLIS.2
-        if self.memory_mode == 'swap':
-            _report('unloading_flux')
-            self._unload_flux()
+            # Generate 3D from image (in swap mode this unloads Flux first). The
+            # decoded PIL image is passed in memory (never re-read from disk);
+            # TRELLIS.2 preprocessing requires PIL input.
+            mesh = self._generate_mesh(image, quality, seed, _report, timings)
 
-        # Generate 3D from image
-        result = self.image_to_3d(
-            image=image,
-            output_dir=output_dir,
-            output_name=output_name,
-            quality=quality,
-            seed=seed,
-            on_progress=on_progress,
-        )
+        # Export outside the lock so another job can start generating meanwhile
+        glb_path = os.path.join(output_dir, f"{output_name}.glb")
+        self._export_glb(mesh, quality, glb_path, _report, timings)
 
-        # Merge timings
-        result.timings = {**timings, **result.timings}
-        result.image_path = image_path
+        # Surface any error from the background save
+        save_future.result()
 
-        return result
+        return InferenceResult(glb_path=glb_path, image_path=image_path, timings=timings)
 
 
-# Global pipeline instance (loaded on import)
-_pipeline: Optional[Trellis2Pipeline] = None
+# Serializes pipeline construction; functools.cache alone would let two
+# concurrent first callers each build one
+_PIPELINE_LOCK = threading.Lock()
 
 
-def get_pipeline() -> Trellis2Pipeline:
-    """Get or create the global pipeline instance."""
-    global _pipeline
-    if _pipeline is None:
-        _pipeline = Trellis2Pipeline(
-            preload_trellis=True,
-            memory_mode="auto",
-        )
-    return _pipeline
+@functools.cache
+def _create_pipeline(memory_mode: str) -> Trellis2Pipeline:
+    """Build a pipeline; failures are not cached, so the next call retries."""
+    return Trellis2Pipeline(
+        preload_trellis=True,
+        memory_mode=memory_mode,
+    )
+
+
+def get_pipeline(memory_mode: str = "auto") -> Trellis2Pipeline:
+    """Get or create the shared pipeline instance for a memory mode."""
+    with _PIPELINE_LOCK:
+        return _create_pipeline(memory_mode)
 
 
 def run_text_to_3d(
@@ -476,7 +970,11 @@ def run_image_to_3d(
     )
 
 
-# Preload on module import
-print("[INFO] Initializing pipeline...")
-_pipeline = Trellis2Pipeline(preload_trellis=True, memory_mode="auto")
-print("[INFO] Pipeline ready.")
+# Optionally warm up the pipeline at import (e.g. in the API server)
+if os.environ.get('TRELLIS_PRELOAD') == '1':
+    logger.info("Initializing pipeline...")
+    _preloaded = get_pipeline()
+    # TRELLIS_WARMUP=<quality> also runs one throwaway generation
+    if os.environ.get('TRELLIS_WARMUP') in QUALITY_PRESETS:
+        _preloaded.warmup(os.environ['TRELLIS_WARMUP'])
+    logger.info("Pipeline ready.")
@@ -0,0 +1,94 @@
+"""
+GPU tests for _GraphedModule (TRELLIS_CUDA_GRAPHS=1).
+
+Skipped unless CUDA and the full model stack (trellis2, diffusers) are
+installed.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+if not torch.cuda.is_available():
+    pytest.skip("CUDA not available", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+wrapper = pytest.importorskip("trellis2_wrapper")
+
+
+def _model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Linear(64, 256), torch.nn.GELU(), torch.nn.Linear(256, 64)
+    ).cuda().eval()
+
+
+@torch.inference_mode()
+def test_replay_matches_eager():
+    """Replayed graphs give the eager result for each captured signature,
+    including when graphs sharing one memory pool are interleaved."""
+    model = _model()
+    graphed = wrapper._GraphedModule(model)
+    for batch in (1, 4, 1, 4, 2, 1):
+        x = torch.randn(batch, 64, device="cuda")
+        torch.testing.assert_close(graphed(x), model(x))
+    assert len(graphed._graphs) == 3
+    assert graphed._pool is not None
+
+
+class _Syncing(torch.nn.Module):
+    """Reads a value back to the host mid-forward, which capture forbids."""
+
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(64, 64)
+
+    def forward(self, x):
+        y = self.linear(x)
+        if y.abs().max().item() < 0:  # never true; forces a device sync
+            y = -y
+        return y
+
+
+@torch.inference_mode()
+def test_capture_failure_falls_back_to_eager():
+    """A forward that cannot be captured runs eagerly instead of raising."""
+    model = _Syncing().cuda().eval()
+    graphed = wrapper._GraphedModule(model)
+    for _ in range(2):
+        x = torch.randn(3, 64, device="cuda")
+        torch.testing.assert_close(graphed(x), model(x))
+    assert not graphed._graphs
+    assert len(graphed._eager_keys) == 1
+
+
+def test_capture_alongside_other_thread():
+    """Capture succeeds while another thread allocates and syncs on the GPU,
+    as GLB export does while the next job generates."""
+    model = _model()
+    graphed = wrapper._GraphedModule(model)
+    stop = threading.Event()
+    errors = []
+
+    def _busy():
+        try:
+            while not stop.is_set():
+                a = torch.randn(512, 512, device="cuda")
+                (a @ a).sum().item()
+        except Exception as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    worker = threading.Thread(target=_busy)
+    worker.start()
+    try:
+        with torch.inference_mode():
+            for batch in range(1, 5):
+                x = torch.randn(batch, 64, device="cuda")
+                torch.testing.assert_close(graphed(x), model(x))
+    finally:
+        stop.set()
+        worker.join()
+    assert not errors
+    assert len(graphed._graphs) == 4
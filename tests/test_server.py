@@ -0,0 +1,242 @@
+"""
+Server tests for the job store, status streaming and upload handling.
+
+Runs the FastAPI app in-process with a stub trellis2_wrapper, so no GPU or
+model weights are needed.
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Prompts starting with "hold" park the job in the 'holding' stage until RELEASE is set
+RELEASE = threading.Event()
+
+
+def _fake_generate(output_dir, output_name, on_progress, hold=False):
+    if hold:
+        on_progress("holding", "Holding")
+        RELEASE.wait(10)
+    for stage in ("generating_mesh", "exporting_glb"):
+        on_progress(stage, stage)
+    os.makedirs(output_dir, exist_ok=True)
+    glb_path = os.path.join(output_dir, f"{output_name}.glb")
+    with open(glb_path, "wb") as f:
+        f.write(b"glTF")
+    return types.SimpleNamespace(glb_path=glb_path, image_path=None, timings={"total": 0.0})
+
+
+def _run_text_to_3d(prompt, output_dir, output_name="output", quality="balanced",
+                    seed=42, on_progress=None):
+    return _fake_generate(output_dir, output_name, on_progress, hold=prompt.startswith("hold"))
+
+
+def _run_image_to_3d(image, output_dir, output_name="output", quality="balanced",
+                     seed=42, on_progress=None):
+    assert image.mode == "RGB"
+    return _fake_generate(output_dir, output_name, on_progress)
+
+
+_wrapper = types.ModuleType("trellis2_wrapper")
+_wrapper.run_text_to_3d = _run_text_to_3d
+_wrapper.run_image_to_3d = _run_image_to_3d
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    """
+    trellis2_server imported against the stub wrapper, with its job store
+    in a temp dir. The stub, env and module are removed afterwards so later
+    test modules import the real wrapper.
+    """
+    tmp = tmp_path_factory.mktemp("trellis2")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OUTPUT_DIR", str(tmp / "outputs"))
+        mp.setenv("JOBS_DB", str(tmp / "jobs.db"))
+        mp.setenv("UPLOAD_DIR", str(tmp / "uploads"))
+        mp.setitem(sys.modules, "trellis2_wrapper", _wrapper)
+        mp.syspath_prepend(SRC_DIR)
+        sys.modules.pop("trellis2_server", None)
+        import trellis2_server
+        try:
+            yield trellis2_server
+        finally:
+            trellis2_server._db.close()
+            sys.modules.pop("trellis2_server", None)
+
+
+@pytest.fixture
+def client(server):
+    RELEASE.clear()
+    with TestClient(server.app) as c:
+        yield c
+    RELEASE.set()
+
+
+def _wait_for(client, job_id, predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/status/{job_id}").json()
+        if predicate(job):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never matched: {job}")
+
+
+def _submit_text(client, prompt="A cube"):
+    r = client.post("/submit/text", json={"prompt": prompt, "quality": "fast"})
+    assert r.status_code == 200
+    return r.json()["job_id"]
+
+
+def test_health_head(server):
+    """HEAD /health answers without a body."""
+    with TestClient(server.app) as c:
+        r = c.head("/health")
+    assert r.status_code == 200
+    assert r.content == b""
+
+
+def test_text_job_streams_to_done(server, client):
+    """SSE stream reports stages and closes on the terminal event."""
+    job_id = _submit_text(client)
+    with client.stream("GET", f"/stream/{job_id}") as stream:
+        events = [
+            json.loads(line[len("data: "):])
+            for line in stream.iter_lines()
+            if line.startswith("data: ")
+        ]
+    assert events[-1]["status"] == "done"
+    assert all(e["status"] not in ("done", "failed") for e in events[:-1])
+    assert job_id not in server.JOB_EVENTS
+
+    # A finished job streams a single terminal event
+    with client.stream("GET", f"/stream/{job_id}") as stream:
+        lines = [line for line in stream.iter_lines() if line.startswith("data: ")]
+    assert len(lines) == 1
+    assert job_id not in server.JOB_EVENTS
+
+
+def test_long_poll_wakes_on_stage_change(client):
+    """/status?wait= returns as soon as the job's stage changes."""
+    job_id = _submit_text(client, "hold")
+    _wait_for(client, job_id, lambda j: j.get("stage") == "holding")
+
+    threading.Timer(0.2, RELEASE.set).start()
+    start = time.time()
+    job = client.get(f"/status/{job_id}", params={"wait": 10}).json()
+    assert time.time() - start < 5
+    assert job["stage"] != "holding"
+    _wait_for(client, job_id, lambda j: j["status"] == "done")
+
+
+def test_long_poll_times_out(server, client):
+    """/status?wait= returns the unchanged job after the wait elapses."""
+    job_id = _submit_text(client, "hold")
+    _wait_for(client, job_id, lambda j: j.get("stage") == "holding")
+
+    start = time.time()
+    job = client.get(f"/status/{job_id}", params={"wait": 0.5}).json()
+    assert time.time() - start >= 0.5
+    assert job["stage"] == "holding"
+
+    RELEASE.set()
+    _wait_for(client, job_id, lambda j: j["status"] == "done")
+    assert job_id not in server.JOB_EVENTS
+
+
+def test_long_poll_finished_job_returns_immediately(server, client):
+    """Finished jobs answer long-polls at once and register no wakeup event."""
+    job_id = _submit_text(client)
+    _wait_for(client, job_id, lambda j: j["status"] == "done")
+
+    start = time.time()
+    job = client.get(f"/status/{job_id}", params={"wait": 5}).json()
+    assert time.time() - start < 1
+    assert job["status"] == "done"
+    assert job_id not in server.JOB_EVENTS
+
+    assert client.get("/status/missing", params={"wait": 1}).status_code == 404
+    assert "missing" not in server.JOB_EVENTS
+
+
+def test_image_job_and_invalid_upload(server, client):
+    """Images are decoded to RGB for the pipeline; non-images get a 400 and
+    corrupt images fail their job."""
+    buf = io.BytesIO()
+    Image.new("RGBA", (8, 8)).save(buf, format="PNG")
+    r = client.post("/submit/image", files={"file": ("a.png", buf.getvalue(), "image/png")})
+    assert r.status_code == 200
+    job = _wait_for(client, r.json()["job_id"], lambda j: j["status"] in ("done", "failed"))
+    assert job["status"] == "done", job.get("error")
+    assert client.get("/" + job["result"]["glb"]).content == b"glTF"
+
+    r = client.post("/submit/image", files={"file": ("a.png", b"not an image", "image/png")})
+    assert r.status_code == 400
+
+    # Valid signature, undecodable body: the job fails and the upload is removed
+    r = client.post(
+        "/submit/image",
+        files={"file": ("a.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 64, "image/png")},
+    )
+    assert r.status_code == 200
+    job = _wait_for(client, r.json()["job_id"], lambda j: j["status"] in ("done", "failed"))
+    assert job["status"] == "failed"
+    assert os.listdir(server.UPLOAD_DIR) == []
+
+
+def test_finished_jobs_reload_from_database(server, client):
+    """Jobs evicted from the memory cache are served from the database."""
+    job_id = _submit_text(client)
+    _wait_for(client, job_id, lambda j: j["status"] == "done")
+
+    with server._JOBS_LOCK:
+        server.JOBS.clear()
+    job = client.get(f"/status/{job_id}").json()
+    assert job["status"] == "done"
+    assert client.get(f"/result/{job_id}").status_code == 200
+
+
+def test_restart_fails_interrupted_jobs(server):
+    """Jobs left running by a previous process are marked failed on startup,
+    and uploads spooled for them are removed."""
+    stale_upload = os.path.join(server.UPLOAD_DIR, "trellis2-upload-stale")
+    with open(stale_upload, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+    server._save_job({
+        "job_id": "interrupted",
+        "type": "text",
+        "status": "running",
+        "stage": "generating_mesh",
+        "created_at": time.time(),
+    })
+    with TestClient(server.app) as c:
+        job = c.get("/status/interrupted").json()
+    assert job["status"] == "failed"
+    assert "restarted" in job["error"]
+    assert not os.path.exists(stale_upload)
+
+
+def test_expired_jobs_are_deleted(server, client):
+    """The TTL sweep drops old finished jobs and their outputs."""
+    job_id = _submit_text(client)
+    _wait_for(client, job_id, lambda j: j["status"] == "done")
+    output_path = os.path.join(server.OUTPUT_DIR, job_id)
+    assert os.path.isdir(output_path)
+
+    job = server._load_job(job_id)
+    job["created_at"] = 0
+    server._save_job(job)
+    server._expire_jobs(3600)
+
+    assert client.get(f"/status/{job_id}").status_code == 404
+    assert not os.path.exists(output_path)